@@ -114,7 +114,14 @@ def _parse_llm_json(content, node_name: str) -> dict:
         raise
 
 
+_DASHBOARD_AGENT = None
+
+
 def create_dashboard_agent():
+    global _DASHBOARD_AGENT
+    if _DASHBOARD_AGENT is not None:
+        return _DASHBOARD_AGENT
+
     llm = ChatGoogleGenerativeAI(model="gemini-2.5-flash", temperature=0)
 
     def analyze_sentiment(state: DashboardState) -> dict:
@@ -219,7 +226,8 @@ y devuelve ÚNICAMENTE un JSON válido (sin markdown) con:
     graph.add_edge("extract_themes", "build_summary")
     graph.add_edge("build_summary", END)
 
-    return graph.compile()
+    _DASHBOARD_AGENT = graph.compile()
+    return _DASHBOARD_AGENT
 
 
 def run_dashboard_agent(data_text: str) -> DashboardState:
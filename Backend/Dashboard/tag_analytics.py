@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import hashlib
+import heapq
 import json
 import logging
 import re
@@ -746,23 +747,26 @@ def _collect_tag_comments(events: pd.DataFrame, tag: str, polarity: str, max_ite
 
 
 def _select_top_signals(tag_insights: list[dict]) -> tuple[list[dict], list[dict]]:
-    strengths = sorted(
-        [item for item in tag_insights if item.get("balance", 0) > 0],
+    # heapq.n{largest,smallest} son O(n log 3) frente al sort completo
+    # O(n log n): importa cuando el vocabulario de tags crece con long tail.
+    strengths = heapq.nlargest(
+        3,
+        (item for item in tag_insights if item.get("balance", 0) > 0),
         key=lambda item: (item.get("balance", 0), item.get("bien", 0)),
-        reverse=True,
-    )[:3]
+    )
 
-    weaknesses = sorted(
-        [item for item in tag_insights if item.get("balance", 0) < 0],
+    weaknesses = heapq.nsmallest(
+        3,
+        (item for item in tag_insights if item.get("balance", 0) < 0),
         key=lambda item: (item.get("balance", 0), -item.get("mal", 0)),
-    )[:3]
+    )
 
     if not weaknesses:
-        weaknesses = sorted(
-            [item for item in tag_insights if item.get("mal", 0) > 0],
+        weaknesses = heapq.nlargest(
+            3,
+            (item for item in tag_insights if item.get("mal", 0) > 0),
             key=lambda item: (item.get("mal", 0), -item.get("balance", 0)),
-            reverse=True,
-        )[:3]
+        )
 
     return strengths, weaknesses
 
@@ -849,13 +853,20 @@ def _fallback_executive_summary(context: dict) -> dict:
     }
 
 
-def _run_executive_summary_langgraph(context: dict) -> dict:
-    llm = _get_llm_client()
+_EXEC_SUMMARY_GRAPH = None
+
+
+def _get_executive_summary_graph():
+    """Grafo compilado del resumen ejecutivo (singleton, como _LLM_CLIENT)."""
+    global _EXEC_SUMMARY_GRAPH
+    if _EXEC_SUMMARY_GRAPH is not None:
+        return _EXEC_SUMMARY_GRAPH
 
     def prepare_context(state: ExecutiveSummaryState) -> dict:
         return {"context_json": state["context_json"]}
 
     def generate_summary(state: ExecutiveSummaryState) -> dict:
+        llm = _get_llm_client()
         system = """Eres consultor senior de restaurantes.
 Recibirás top 3 fortalezas y top 3 debilidades con comentarios reales de clientes.
 
@@ -888,7 +899,12 @@ Reglas:
     graph.add_edge("prepare_context", "generate_summary")
     graph.add_edge("generate_summary", END)
 
-    app = graph.compile()
+    _EXEC_SUMMARY_GRAPH = graph.compile()
+    return _EXEC_SUMMARY_GRAPH
+
+
+def _run_executive_summary_langgraph(context: dict) -> dict:
+    app = _get_executive_summary_graph()
     initial_state: ExecutiveSummaryState = {
         "context_json": json.dumps(context, ensure_ascii=False),
         "summary": {},
@@ -989,10 +1005,10 @@ def build_dashboard_payload_from_tags() -> TagAnalysisResult:
         key=lambda x: (x["balance"], x["bien"]),
         reverse=True,
     )
-    complaint_candidates = sorted(
-        [item for item in tag_insights if item["mal"] > 0],
+    complaint_candidates = heapq.nlargest(
+        5,
+        (item for item in tag_insights if item["mal"] > 0),
         key=lambda x: (x["mal"], -x["balance"]),
-        reverse=True,
     )
 
     top_praises = [
@@ -4,6 +4,8 @@ import re
 import time
 from typing import List, TypedDict
 
+import numpy as np
+
 from dotenv import load_dotenv
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.messages import HumanMessage, SystemMessage
@@ -144,9 +146,16 @@ Devuelve ÚNICAMENTE un JSON válido (sin markdown):
 }"""
 
         # ── Preparar batch de mensajes ──────────────────────────────────────
-        ordered_ids: List[int] = sorted(
-            qualified_ids, key=lambda x: spending_info[x], reverse=True
+        # Orden por gasto descendente vía argsort sobre ndarrays: más barato
+        # que sorted() con lambda de lookup por elemento.
+        qualified_list = list(qualified_ids)
+        ids_arr = np.fromiter(qualified_list, dtype=np.int64, count=len(qualified_list))
+        spend_arr = np.fromiter(
+            (spending_info[c] for c in qualified_list),
+            dtype=np.float64,
+            count=len(qualified_list),
         )
+        ordered_ids: List[int] = ids_arr[np.argsort(-spend_arr)].tolist()
         batch_inputs: List[List] = []
         batch_ids: List[int] = []
         for client_id in ordered_ids:
@@ -362,21 +371,8 @@ Devuelve ÚNICAMENTE un JSON válido (sin markdown):
     return graph.compile(checkpointer=_checkpointer)
 
 
-# ── Función standalone para el HITL ───────────────────────────────────────────
-def regenerate_single_promotion(lead: dict, instructions: str, feedback: str) -> str:
-    """
-    Regenera el mensaje de promoción para un lead específico
-    siguiendo las instrucciones del revisor humano.
-    Llamado desde el frontend durante la fase de revisión HITL.
-    """
-    logger.info(
-        "── regenerate_single_promotion ── cliente=%s cat=%s",
-        lead.get("id_cliente"), lead.get("categoria"),
-    )
-    t0 = time.perf_counter()
-    llm = _get_llm()
-
-    system = """Eres copywriter experto en marketing de restaurantes peruanos.
+# ── Funciones standalone para el HITL ─────────────────────────────────────────
+_REGEN_SYSTEM = """Eres copywriter experto en marketing de restaurantes peruanos.
 Tienes un mensaje de WhatsApp ya generado para un cliente y debes modificarlo
 siguiendo exactamente las instrucciones del revisor humano.
 
@@ -391,8 +387,10 @@ Devuelve ÚNICAMENTE un JSON válido (sin markdown):
   "mensaje_promo": "<mensaje de WhatsApp modificado>"
 }"""
 
-    messages = [
-        SystemMessage(content=system),
+
+def _build_regen_messages(lead: dict, instructions: str, feedback: str) -> list:
+    return [
+        SystemMessage(content=_REGEN_SYSTEM),
         HumanMessage(
             content=(
                 f"Categoría del cliente: {lead['categoria']}\n"
@@ -404,8 +402,22 @@ Devuelve ÚNICAMENTE un JSON válido (sin markdown):
         ),
     ]
 
+
+def regenerate_single_promotion(lead: dict, instructions: str, feedback: str) -> str:
+    """
+    Regenera el mensaje de promoción para un lead específico
+    siguiendo las instrucciones del revisor humano.
+    Llamado desde el frontend durante la fase de revisión HITL.
+    """
+    logger.info(
+        "── regenerate_single_promotion ── cliente=%s cat=%s",
+        lead.get("id_cliente"), lead.get("categoria"),
+    )
+    t0 = time.perf_counter()
+    llm = _get_llm()
+
     try:
-        response = llm.invoke(messages)
+        response = llm.invoke(_build_regen_messages(lead, instructions, feedback))
         result = parse_json(response.content)
         new_msg = result.get("mensaje_promo", lead.get("mensaje_promo", ""))
         logger.info(
@@ -415,3 +427,29 @@ Devuelve ÚNICAMENTE un JSON válido (sin markdown):
     except Exception as e:
         logger.error("  Error regenerando mensaje: %s", str(e)[:80])
         return lead.get("mensaje_promo", "")
+
+
+async def aregenerate_single_promotion(lead: dict, instructions: str, feedback: str) -> str:
+    """
+    Variante asíncrona de `regenerate_single_promotion` para regenerar
+    varios leads en paralelo con `asyncio.gather`: N llamadas al LLM
+    cuestan ~la latencia de la más lenta en vez de la suma.
+    """
+    logger.info(
+        "── aregenerate_single_promotion ── cliente=%s cat=%s",
+        lead.get("id_cliente"), lead.get("categoria"),
+    )
+    t0 = time.perf_counter()
+    llm = _get_llm()
+
+    try:
+        response = await llm.ainvoke(_build_regen_messages(lead, instructions, feedback))
+        result = parse_json(response.content)
+        new_msg = result.get("mensaje_promo", lead.get("mensaje_promo", ""))
+        logger.info(
+            "  Mensaje regenerado (async) en %.2fs", time.perf_counter() - t0
+        )
+        return new_msg
+    except Exception as e:
+        logger.error("  Error regenerando mensaje (async): %s", str(e)[:80])
+        return lead.get("mensaje_promo", "")
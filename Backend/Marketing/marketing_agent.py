@@ -1,17 +1,23 @@
+import asyncio
 import base64
+import functools
+import hashlib
 import json
 import logging
 import os
 import re
-from typing import List, TypedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import TYPE_CHECKING, Annotated, List, TypedDict
 
-import openai
 from dotenv import load_dotenv
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_core.messages import HumanMessage, SystemMessage
-from langgraph.checkpoint.memory import MemorySaver
-from langgraph.graph import END, StateGraph
-from langgraph.types import interrupt
+
+# Los stacks de openai / langchain / langgraph (gRPC, protobuf, pydantic…)
+# agregan segundos al cold start de Streamlit, así que se importan de forma
+# diferida dentro de las funciones que realmente los usan.
+if TYPE_CHECKING:
+    import openai
+    from langchain_google_genai import ChatGoogleGenerativeAI
 
 load_dotenv()
 
@@ -24,7 +30,21 @@ if not logger.handlers:
     logger.addHandler(_handler)
     logger.setLevel(logging.DEBUG)
 
-_checkpointer = MemorySaver()
+# Pool compartido para llamadas de red largas (p. ej. generación de imágenes),
+# de modo que no bloqueen el worker thread del grafo.
+_IO_EXECUTOR = ThreadPoolExecutor(max_workers=4)
+
+_checkpointer = None
+
+
+def _get_checkpointer():
+    """Checkpointer singleton con import diferido de langgraph."""
+    global _checkpointer
+    if _checkpointer is None:
+        from langgraph.checkpoint.memory import MemorySaver
+
+        _checkpointer = MemorySaver()
+    return _checkpointer
 
 
 # ── Helpers ───────────────────────────────────────────────────────────────────
@@ -58,31 +78,56 @@ def _parse_json(text) -> dict | list:
     raise ValueError(f"No se pudo parsear JSON:\n{text[:300]}")
 
 
-def _get_llm(temperature: float = 0.0) -> ChatGoogleGenerativeAI:
+@functools.lru_cache(maxsize=4)
+def _get_llm(temperature: float = 0.0) -> "ChatGoogleGenerativeAI":
+    # Memoizado por temperatura: reutiliza el pool de conexiones gRPC/HTTP
+    # en vez de reconstruir el cliente en cada llamada.
+    from langchain_google_genai import ChatGoogleGenerativeAI
+
     return ChatGoogleGenerativeAI(model="gemini-flash-lite-latest", temperature=temperature)
 
 
-def _generate_image_bytes(prompt: str) -> bytes:
-    """Genera imagen vía OpenAI gpt-image-1. Devuelve bytes."""
-    api_key = os.environ.get("OPENAI_API_KEY", "")
-    if not api_key:
-        raise ValueError("OPENAI_API_KEY no está configurada en el entorno.")
+_OPENAI_CLIENT: "openai.OpenAI | None" = None
+
 
-    client = openai.OpenAI(api_key=api_key)
-    logger.info("Llamando a OpenAI gpt-image-1…")
+def _get_openai_client() -> "openai.OpenAI":
+    """Cliente OpenAI singleton (lazy) para conservar conexiones keep-alive."""
+    global _OPENAI_CLIENT
+    if _OPENAI_CLIENT is None:
+        import openai
 
+        api_key = os.environ.get("OPENAI_API_KEY", "")
+        if not api_key:
+            raise ValueError("OPENAI_API_KEY no está configurada en el entorno.")
+        _OPENAI_CLIENT = openai.OpenAI(api_key=api_key)
+    return _OPENAI_CLIENT
+
+
+def _generate_image_bytes(prompt: str, preview: bool = False) -> bytes:
+    """Genera imagen vía OpenAI gpt-image-1. Devuelve bytes.
+
+    Con ``preview=True`` pide 1024x1024 (~44% menos píxeles): más rápido y
+    barato para los ciclos de iteración HITL, donde se ajusta el prompt y
+    no la calidad final.
+    """
+    client = _get_openai_client()
+    size = "1024x1024" if preview else "1536x1024"
+    logger.info("Llamando a OpenAI gpt-image-1… (size=%s)", size)
+
+    # gpt-image-1 siempre responde b64_json y rechaza `response_format`
+    # con un 400 (eso es semántica de DALL·E): decodificar directo.
     result = client.images.generate(
         model="gpt-image-1",
         prompt=prompt,
         n=1,
-        size="1536x1024",
+        size=size,
     )
 
-    b64_data = result.data[0].b64_json
-    if not b64_data:
+    data = result.data[0]
+    if not data.b64_json:
         raise RuntimeError("No se recibió imagen en la respuesta de OpenAI.")
+    img_bytes = base64.b64decode(data.b64_json)
 
-    img_bytes = base64.b64decode(b64_data)
     logger.info("Imagen recibida: %s bytes", f"{len(img_bytes):,}")
     return img_bytes
 
@@ -106,9 +151,48 @@ def _build_image_prompt(dishes: List[str], extra: str = "") -> str:
 
 # ── 1. Extracción de platos (standalone, cacheado en Streamlit) ───────────────
 
+DISH_CACHE_PATH = Path(__file__).parent.parent.parent / "Data" / "dish_llm_cache.json"
+
+
+def _load_dish_cache() -> dict:
+    if DISH_CACHE_PATH.exists():
+        try:
+            return json.loads(DISH_CACHE_PATH.read_text(encoding="utf-8"))
+        except (json.JSONDecodeError, OSError):
+            logger.warning("Cache de platos corrupto o ilegible → ignorado")
+    return {}
+
+
+def _save_dish_cache(cache: dict) -> None:
+    try:
+        DISH_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        # Separadores compactos: payload más chico en disco y menos bytes
+        # que parsear al recargar el cache en cold starts.
+        DISH_CACHE_PATH.write_text(
+            json.dumps(cache, ensure_ascii=False, separators=(",", ":")),
+            encoding="utf-8",
+        )
+    except OSError as e:
+        logger.warning("No se pudo persistir el cache de platos: %s", e)
+
+
 def extract_top_dishes(food_responses: List[str], top_n: int = 10) -> List[dict]:
-    llm = _get_llm(temperature=0)
     clean = [str(r) for r in food_responses if str(r).strip() not in ("", "nan", "NaN")]
+
+    # Cache exacto en disco: mismo conjunto de respuestas (orden-independiente)
+    # + mismo top_n → reutilizar el resultado sin invocar al LLM.
+    digest = hashlib.blake2b(
+        "\n".join(sorted(clean)).encode("utf-8"), digest_size=16
+    ).hexdigest()
+    cache_key = f"{digest}||{top_n}"
+    cache = _load_dish_cache()
+    if cache_key in cache:
+        logger.info("Platos desde cache exacto (key=%s…)", cache_key[:12])
+        return cache[cache_key]
+
+    from langchain_core.messages import HumanMessage, SystemMessage
+
+    llm = _get_llm(temperature=0)
     combined = "\n".join(f"- {r}" for r in clean)
     logger.info("Analizando %d respuestas de comida…", len(clean))
 
@@ -141,6 +225,8 @@ Máximo 10 platos, ordenados de mayor a menor mención."""
         data = _parse_json(response.content)
         dishes = data.get("platos", [])[:top_n]
         logger.info("Platos extraídos: %s", [d["plato"] for d in dishes])
+        cache[cache_key] = dishes
+        _save_dish_cache(cache)
         return dishes
     except Exception as e:
         logger.error("Error extrayendo platos: %s", e)
@@ -149,17 +235,33 @@ Máximo 10 platos, ordenados de mayor a menor mención."""
 
 # ── 2. LangGraph — Estado y Grafo ────────────────────────────────────────────
 
+def _merge_errors(current: str, new: str) -> str:
+    """Reducer de ``error``: al correr texto e imagen en paralelo ambas ramas
+    pueden escribir la clave en el mismo superstep; se conserva el primero."""
+    return current or new
+
+
 class MarketingState(TypedDict):
     selected_dishes: List[str]
     campaign_text: str
     image_bytes: bytes
     approved_text: str
     approved_image: bytes
-    error: str
+    error: Annotated[str, _merge_errors]
+
+
+_AGENT = None
 
 
 def create_marketing_agent():
-    """Crea el grafo LangGraph: generate_text → generate_image → human_review."""
+    """Devuelve el grafo LangGraph compilado (singleton): (generate_text ∥ generate_image) → human_review."""
+    global _AGENT
+    if _AGENT is not None:
+        return _AGENT
+
+    from langchain_core.messages import HumanMessage, SystemMessage
+    from langgraph.graph import END, START, StateGraph
+    from langgraph.types import interrupt
 
     # ── Nodo 1: Generar texto ──────────────────────────────────────────────
     def generate_text(state: MarketingState) -> dict:
@@ -200,11 +302,11 @@ Devuelve ÚNICAMENTE el texto de la campaña, sin JSON, sin comillas extra."""
 
     # ── Nodo 2: Generar imagen ─────────────────────────────────────────────
     def generate_image(state: MarketingState) -> dict:
-        if state.get("error"):
-            return {}
         logger.info("── generate_image START ──")
         try:
             prompt = _build_image_prompt(state["selected_dishes"])
+            # Llamada directa: LangGraph ya ejecuta esta rama en su propio
+            # thread en paralelo con generate_text.
             img_bytes = _generate_image_bytes(prompt)
             logger.info("── generate_image END ── %s bytes", f"{len(img_bytes):,}")
             return {"image_bytes": img_bytes}
@@ -231,22 +333,21 @@ Devuelve ÚNICAMENTE el texto de la campaña, sin JSON, sin comillas extra."""
     graph.add_node("generate_image", generate_image)
     graph.add_node("human_review", human_review)
 
-    graph.set_entry_point("generate_text")
-    graph.add_edge("generate_text", "generate_image")
-    graph.add_edge("generate_image", "human_review")
+    # Texto e imagen no dependen entre sí (el prompt de imagen se arma solo
+    # con los platos): se ejecutan como ramas paralelas y human_review espera
+    # a ambas. La latencia total pasa de texto+imagen a max(texto, imagen).
+    graph.add_edge(START, "generate_text")
+    graph.add_edge(START, "generate_image")
+    graph.add_edge(["generate_text", "generate_image"], "human_review")
     graph.add_edge("human_review", END)
 
-    return graph.compile(checkpointer=_checkpointer)
+    _AGENT = graph.compile(checkpointer=_get_checkpointer())
+    return _AGENT
 
 
 # ── 3. Funciones standalone para HITL ─────────────────────────────────────────
 
-def regenerate_campaign_text(current_text: str, dishes: List[str], instructions: str) -> str:
-    """Regenera el texto de campaña siguiendo instrucciones del humano."""
-    logger.info("── regenerate_campaign_text ── instrucciones: %s", instructions[:80])
-    llm = _get_llm(temperature=0.9)
-
-    system = """Eres un copywriter creativo especializado en gastronomía peruana.
+_TEXT_REGEN_SYSTEM = """Eres un copywriter creativo especializado en gastronomía peruana.
 Tienes un texto de campaña ya generado y debes modificarlo siguiendo
 exactamente las instrucciones del revisor humano.
 
@@ -258,8 +359,12 @@ Reglas:
 
 Devuelve ÚNICAMENTE el texto modificado, sin JSON, sin comillas extra."""
 
-    messages = [
-        SystemMessage(content=system),
+
+def _build_text_regen_messages(current_text: str, dishes: List[str], instructions: str) -> list:
+    from langchain_core.messages import HumanMessage, SystemMessage
+
+    return [
+        SystemMessage(content=_TEXT_REGEN_SYSTEM),
         HumanMessage(
             content=(
                 f"Platos de la campaña: {', '.join(dishes)}\n\n"
@@ -269,14 +374,26 @@ Devuelve ÚNICAMENTE el texto modificado, sin JSON, sin comillas extra."""
         ),
     ]
 
+
+def _coerce_text(content) -> str:
+    """Normaliza response.content (str o lista de partes) a un str limpio."""
+    if isinstance(content, list):
+        content = " ".join(
+            p if isinstance(p, str) else p.get("text", "") for p in content
+        )
+    return content.strip()
+
+
+def regenerate_campaign_text(current_text: str, dishes: List[str], instructions: str) -> str:
+    """Regenera el texto de campaña siguiendo instrucciones del humano."""
+    logger.info("── regenerate_campaign_text ── instrucciones: %s", instructions[:80])
+    llm = _get_llm(temperature=0.9)
+
     try:
-        response = llm.invoke(messages)
-        text = response.content
-        if isinstance(text, list):
-            text = " ".join(
-                p if isinstance(p, str) else p.get("text", "") for p in text
-            )
-        result = text.strip()
+        response = llm.invoke(
+            _build_text_regen_messages(current_text, dishes, instructions)
+        )
+        result = _coerce_text(response.content)
         logger.info("Texto regenerado: %d chars", len(result))
         return result
     except Exception as e:
@@ -284,8 +401,52 @@ Devuelve ÚNICAMENTE el texto modificado, sin JSON, sin comillas extra."""
         return current_text
 
 
-def regenerate_campaign_image(dishes: List[str], instructions: str) -> bytes:
+async def _aregenerate_campaign_text(current_text: str, dishes: List[str], instructions: str) -> str:
+    """Variante asíncrona de la regeneración de texto (para gather)."""
+    llm = _get_llm(temperature=0.9)
+    try:
+        response = await llm.ainvoke(
+            _build_text_regen_messages(current_text, dishes, instructions)
+        )
+        result = _coerce_text(response.content)
+        logger.info("Texto regenerado (async): %d chars", len(result))
+        return result
+    except Exception as e:
+        logger.error("Error regenerando texto (async): %s", e)
+        return current_text
+
+
+def regenerate_campaign_both(
+    current_text: str,
+    dishes: List[str],
+    text_instructions: str,
+    image_instructions: str,
+    preview: bool = False,
+) -> tuple:
+    """Regenera texto e imagen en paralelo en una sola pasada.
+
+    El texto va por ``ainvoke`` y la imagen por el pool de I/O; el costo
+    total es ~max(texto, imagen) en vez de la suma de ambos round-trips.
+    """
+    logger.info("── regenerate_campaign_both ── lanzando texto + imagen en paralelo")
+    prompt = _build_image_prompt(dishes, extra=image_instructions)
+
+    async def _run():
+        loop = asyncio.get_running_loop()
+        return await asyncio.gather(
+            _aregenerate_campaign_text(current_text, dishes, text_instructions),
+            loop.run_in_executor(
+                _IO_EXECUTOR,
+                functools.partial(_generate_image_bytes, prompt, preview=preview),
+            ),
+        )
+
+    new_text, new_image = asyncio.run(_run())
+    return new_text, new_image
+
+
+def regenerate_campaign_image(dishes: List[str], instructions: str, preview: bool = False) -> bytes:
     """Regenera la imagen de campaña con instrucciones adicionales del humano."""
     logger.info("── regenerate_campaign_image ── instrucciones: %s", instructions[:80])
     prompt = _build_image_prompt(dishes, extra=instructions)
-    return _generate_image_bytes(prompt)
+    return _generate_image_bytes(prompt, preview=preview)
@@ -18,37 +18,55 @@ COL_CAMBIO = "¿Qué es lo que cambiarías de la experiencia?"
 
 
 @st.cache_data(show_spinner=False)
-def load_data() -> pd.DataFrame:
-    """Carga el dataset de feedback de comensales desde el CSV."""
-    return pd.read_csv(DATA_PATH)
+def load_data(columns: tuple[str, ...] | None = None) -> pd.DataFrame:
+    """Carga el dataset de feedback de comensales desde el CSV.
+
+    Con ``columns`` se limita el parseo a esas columnas (menos memoria y
+    payload más chico hacia el cache cuando una página no usa todo el CSV).
+    """
+    return pd.read_csv(DATA_PATH, usecols=list(columns) if columns else None)
 
 
 def get_data_summary(df: pd.DataFrame) -> dict:
     """Retorna estadísticas básicas del dataset."""
+    # Una sola pasada sobre la columna en vez de cuatro reducciones separadas.
+    stats = df[COL_CONSUMO].agg(["mean", "max", "min", "sum"])
     return {
         "total_customers": len(df),
-        "avg_consumption": df[COL_CONSUMO].mean(),
-        "max_consumption": df[COL_CONSUMO].max(),
-        "min_consumption": df[COL_CONSUMO].min(),
-        "total_revenue": df[COL_CONSUMO].sum(),
+        "avg_consumption": stats["mean"],
+        "max_consumption": stats["max"],
+        "min_consumption": stats["min"],
+        "total_revenue": stats["sum"],
     }
 
 
 def df_to_text(df: pd.DataFrame) -> str:
     """Convierte el DataFrame a texto estructurado para procesamiento por LLM."""
-    records = []
-    for _, row in df.iterrows():
-        record = (
-            f"Cliente {row[COL_ID]}:\n"
-            f"- Consumo: S/. {row[COL_CONSUMO]}\n"
-            f"- Qué mejoraría de la atención: {row[COL_MEJORA_ATENCION]}\n"
-            f"- Cómo le pareció la atención: {row[COL_ATENCION]}\n"
-            f"- Qué le gustó más de la comida: {row[COL_COMIDA]}\n"
-            f"- Opinión calidad/precio: {row[COL_PRECIO_CALIDAD]}\n"
-            f"- Qué le gustó del ambiente: {row[COL_AMBIENTE]}\n"
-            f"- Qué cambiaría: {row[COL_CAMBIO]}"
+    # Extraer cada columna una sola vez como ndarray y recorrer con zip:
+    # evita materializar una Series por fila (costo dominante de iterrows).
+    ids = df[COL_ID].to_numpy()
+    consumos = df[COL_CONSUMO].to_numpy()
+    mejoras = df[COL_MEJORA_ATENCION].to_numpy()
+    atenciones = df[COL_ATENCION].to_numpy()
+    comidas = df[COL_COMIDA].to_numpy()
+    precios = df[COL_PRECIO_CALIDAD].to_numpy()
+    ambientes = df[COL_AMBIENTE].to_numpy()
+    cambios = df[COL_CAMBIO].to_numpy()
+
+    records = [
+        (
+            f"Cliente {id_c}:\n"
+            f"- Consumo: S/. {consumo}\n"
+            f"- Qué mejoraría de la atención: {mejora}\n"
+            f"- Cómo le pareció la atención: {atencion}\n"
+            f"- Qué le gustó más de la comida: {comida}\n"
+            f"- Opinión calidad/precio: {precio}\n"
+            f"- Qué le gustó del ambiente: {ambiente}\n"
+            f"- Qué cambiaría: {cambio}"
         )
-        records.append(record)
+        for id_c, consumo, mejora, atencion, comida, precio, ambiente, cambio
+        in zip(ids, consumos, mejoras, atenciones, comidas, precios, ambientes, cambios)
+    ]
     return "\n\n".join(records)
 
 
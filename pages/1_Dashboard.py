@@ -1,7 +1,9 @@
-import streamlit as st
-import plotly.graph_objects as go
 import logging
 
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
 from Backend.Dashboard.dashboard_agent import run_dashboard_agent_from_df
 from Backend.Dashboard.tag_analytics import reset_incremental_tag_storage
 from Frontend.utils.data_loader import get_data_summary, load_data
@@ -25,12 +27,65 @@ SCORE_LABELS = {
 DEFAULT_HOVER_COMMENT = "Sin comentarios"
 
 
-@st.cache_data(show_spinner="Analizando feedback con IA…")
+def _df_fingerprint(df: pd.DataFrame) -> tuple:
+    """Huella barata del dataset: evita hashear celda por celda en cada rerun.
+
+    Filas nuevas cambian el tamaño o el último ID; el pipeline incremental
+    hashea cada fila por su cuenta, así que esta clave solo decide hit/miss.
+    """
+    last_id = str(df["ID_Cliente"].iloc[-1]) if len(df) else ""
+    return (len(df), df.shape[1], last_id)
+
+
+@st.cache_data(show_spinner="Analizando feedback con IA…", hash_funcs={pd.DataFrame: _df_fingerprint})
 def get_analysis(df) -> dict:
+    # Fast path: sin filas no hay nada que analizar; evita el round-trip
+    # al agente (y el spinner bloqueante) con el dataset vacío.
+    if df is None or df.empty:
+        return {
+            "sentiment_scores": {},
+            "key_themes": {},
+            "summary": {},
+            "error": "",
+            "metadata": {},
+        }
     return run_dashboard_agent_from_df(df)
 
 
-def render_score_bar(sentiment_scores: dict) -> go.Figure:
+@st.cache_data
+def build_kpi_row(total: int, avg: float, max_c: float, min_c: float, revenue: float) -> str:
+    """Fila de KPIs como un solo bloque HTML: 1 widget en vez de 5 metrics."""
+    cards = [
+        ("Comensales", f"{total}"),
+        ("Consumo Promedio", f"S/. {avg:.2f}"),
+        ("Consumo Máximo", f"S/. {max_c:.2f}"),
+        ("Consumo Mínimo", f"S/. {min_c:.2f}"),
+        ("Ingresos Totales", f"S/. {revenue:.2f}"),
+    ]
+    items = "".join(
+        f"<div style='flex:1'>"
+        f"<div style='font-size:0.85rem;opacity:0.7'>{label}</div>"
+        f"<div style='font-size:1.9rem;font-weight:600'>{value}</div>"
+        f"</div>"
+        for label, value in cards
+    )
+    return f"<div style='display:flex;gap:2rem'>{items}</div>"
+
+
+# Hash estable y barato para los dicts de entrada de las figuras: mientras los
+# datos no cambien, Streamlit reenvía el mismo dict de figura cacheado y evita
+# revalidar/reconstruir los objetos Plotly en cada rerun. Con persist="disk"
+# las figuras sobreviven reinicios del servidor: si el análisis de ayer sigue
+# vigente, el primer render tras un restart también es un hit.
+_FIG_CACHE_KWARGS = {
+    "hash_funcs": {dict: lambda d: tuple(sorted(d.items()))},
+    "persist": "disk",
+    "max_entries": 32,
+}
+
+
+@st.cache_data(**_FIG_CACHE_KWARGS)
+def render_score_bar(sentiment_scores: dict) -> dict:
     labels, values, colors = [], [], []
     for key, label in SCORE_LABELS.items():
         if key in sentiment_scores:
@@ -61,16 +116,19 @@ def render_score_bar(sentiment_scores: dict) -> go.Figure:
         height=380,
         margin={"t": 50, "b": 30},
     )
-    return fig
+    return fig.to_dict()
 
 
-def render_distribution_donut(sentiment_scores: dict) -> go.Figure:
+@st.cache_data(**_FIG_CACHE_KWARGS)
+def render_distribution_donut(sentiment_scores: dict) -> dict | None:
     labels = ["Positivos", "Neutros", "Negativos"]
     values = [
         sentiment_scores.get("positivos", 0),
         sentiment_scores.get("neutros", 0),
         sentiment_scores.get("negativos", 0),
     ]
+    if not sum(values):
+        return None
     fig = go.Figure(
         go.Pie(
             labels=labels,
@@ -84,59 +142,100 @@ def render_distribution_donut(sentiment_scores: dict) -> go.Figure:
         height=380,
         margin={"t": 50, "b": 30},
     )
-    return fig
+    return fig.to_dict()
 
 
-def render_tags_by_polarity(tag_insights: list[dict]) -> go.Figure:
-    sorted_tags = sorted(
-        tag_insights,
-        key=lambda x: x.get("total_mentions", x.get("bien", 0) + x.get("neutral", 0) + x.get("mal", 0)),
-        reverse=True,
-    )[:5]
-
-    tags = [item.get("tag", "") for item in sorted_tags]
-    bien = [item.get("bien", 0) for item in sorted_tags]
-    neutral = [item.get("neutral", 0) for item in sorted_tags]
-    mal = [item.get("mal", 0) for item in sorted_tags]
-    hover_bien = [item.get("hover_bien", DEFAULT_HOVER_COMMENT) for item in sorted_tags]
-    hover_neutral = [item.get("hover_neutral", DEFAULT_HOVER_COMMENT) for item in sorted_tags]
-    hover_mal = [item.get("hover_mal", DEFAULT_HOVER_COMMENT) for item in sorted_tags]
+def _tag_insights_frame(tag_insights: list[dict], columns: list[str]) -> pd.DataFrame:
+    """Convierte la lista de insights a DataFrame con defaults vectorizados."""
+    df = pd.DataFrame(tag_insights).reindex(columns=columns)
 
-    fig = go.Figure()
-    fig.add_trace(
-        go.Bar(
-            y=tags,
-            x=bien,
-            name="Bien",
-            orientation="h",
-            marker_color="#4CAF50",
-            customdata=hover_bien,
-            hovertemplate="<b>%{y}</b><br>Clientes (bien): %{x}<br><br>%{customdata}<extra></extra>",
+    numeric = [c for c in ("bien", "neutral", "mal", "balance") if c in columns]
+    df[numeric] = df[numeric].fillna(0)
+
+    hovers = [c for c in columns if c.startswith("hover_")]
+    df[hovers] = df[hovers].fillna(DEFAULT_HOVER_COMMENT)
+
+    df["tag"] = df["tag"].fillna("")
+    if "total_mentions" in columns:
+        df["total_mentions"] = df["total_mentions"].fillna(
+            df["bien"] + df["neutral"] + df["mal"]
         )
+    return df
+
+
+@st.cache_data(hash_funcs={dict: lambda d: tuple(sorted(d.items()))})
+def prepare_tag_views(tag_insights: list[dict]) -> dict:
+    """Precorta los top-5 por vista en una sola pasada sobre los insights.
+
+    Las funciones de figura reciben estructuras ya reducidas: con un long
+    tail de miles de tags, el filtrado/orden no se repite por gráfico.
+    """
+    df_pol = _tag_insights_frame(
+        tag_insights,
+        ["tag", "bien", "neutral", "mal", "total_mentions",
+         "hover_bien", "hover_neutral", "hover_mal"],
     )
-    fig.add_trace(
-        go.Bar(
-            y=tags,
-            x=neutral,
-            name="Neutral",
-            orientation="h",
-            marker_color="#FF9800",
-            customdata=hover_neutral,
-            hovertemplate="<b>%{y}</b><br>Clientes (neutral): %{x}<br><br>%{customdata}<extra></extra>",
-        )
+    df_bal = _tag_insights_frame(
+        tag_insights,
+        ["tag", "bien", "neutral", "mal", "balance", "hover_bien", "hover_mal"],
     )
-    fig.add_trace(
-        go.Bar(
-            y=tags,
-            x=mal,
-            name="Mal",
-            orientation="h",
-            marker_color="#F44336",
-            customdata=hover_mal,
-            hovertemplate="<b>%{y}</b><br>Clientes (mal): %{x}<br><br>%{customdata}<extra></extra>",
-        )
+    return {
+        "polarity_top5": (
+            df_pol[df_pol["total_mentions"] > 0]
+            .nlargest(5, "total_mentions")
+            .to_dict("records")
+        ),
+        "balance_pos_top5": (
+            df_bal[df_bal["balance"] > 0].nlargest(5, "balance").to_dict("records")
+        ),
+        "balance_neg_top5": (
+            df_bal[df_bal["balance"] < 0].nsmallest(5, "balance").to_dict("records")
+        ),
+    }
+
+
+@st.cache_data(**_FIG_CACHE_KWARGS)
+def render_tags_by_polarity(top_tags: list[dict]) -> dict:
+    # Tags sin menciones ya fueron filtrados en prepare_tag_views; acá solo
+    # se arma la figura desde la vista reducida.
+    top = pd.DataFrame(top_tags).reindex(
+        columns=["tag", "bien", "neutral", "mal",
+                 "hover_bien", "hover_neutral", "hover_mal"],
     )
 
+    tags = top["tag"].tolist()
+    bien = top["bien"].tolist()
+    neutral = top["neutral"].tolist()
+    mal = top["mal"].tolist()
+    # Acotar los comentarios de hover: strings largos inflan el payload.
+    hover_bien = top["hover_bien"].astype(str).str[:400].tolist()
+    hover_neutral = top["hover_neutral"].astype(str).str[:400].tolist()
+    hover_mal = top["hover_mal"].astype(str).str[:400].tolist()
+
+    fig = go.Figure()
+    polarity_traces = [
+        ("Bien", bien, "#4CAF50", hover_bien),
+        ("Neutral", neutral, "#FF9800", hover_neutral),
+        ("Mal", mal, "#F44336", hover_mal),
+    ]
+    for name, values, color, hovers in polarity_traces:
+        if not any(values):
+            continue
+        fig.add_trace(
+            go.Bar(
+                y=tags,
+                x=values,
+                name=name,
+                orientation="h",
+                marker_color=color,
+                customdata=hovers,
+                hovertemplate=(
+                    f"<b>%{{y}}</b><br>Clientes ({name.lower()}): %{{x}}"
+                    "<br><br>%{customdata}<extra></extra>"
+                ),
+            )
+        )
+
     fig.update_layout(
         title="Top 5 Tags por Polaridad (clientes únicos)",
         barmode="group",
@@ -147,34 +246,38 @@ def render_tags_by_polarity(tag_insights: list[dict]) -> go.Figure:
         legend={"orientation": "h", "y": 1.08},
     )
     fig.update_yaxes(autorange="reversed")
-    return fig
+    return fig.to_dict()
 
 
-def render_tag_balance(tag_insights: list[dict], balance_mode: str) -> go.Figure:
+@st.cache_data(**_FIG_CACHE_KWARGS)
+def render_tag_balance(top_tags: list[dict], balance_mode: str) -> dict:
+    top = pd.DataFrame(top_tags).reindex(
+        columns=["tag", "bien", "neutral", "mal", "balance",
+                 "hover_bien", "hover_mal"],
+    )
+
     if balance_mode == "Top Buenos":
-        filtered = [item for item in tag_insights if item.get("balance", 0) > 0]
-        sorted_tags = sorted(filtered, key=lambda x: x.get("balance", 0), reverse=True)[:5]
         title = "Balance por Tag · Top Buenos"
         hover_comment_title = "Comentarios (bien)"
         hover_comment_key = "hover_bien"
     else:
-        filtered = [item for item in tag_insights if item.get("balance", 0) < 0]
-        sorted_tags = sorted(filtered, key=lambda x: x.get("balance", 0))[:5]
         title = "Balance por Tag · Top Malos"
         hover_comment_title = "Comentarios (mal)"
         hover_comment_key = "hover_mal"
 
-    if not sorted_tags:
-        sorted_tags = []
+    if top.empty:
         title = "Balance por Tag"
 
-    tags = [item.get("tag", "") for item in sorted_tags]
-    balances = [item.get("balance", 0) for item in sorted_tags]
+    tags = top["tag"].tolist()
+    balances = top["balance"].tolist()
     colors = ["#F44336" if value < 0 else "#4CAF50" for value in balances]
     hover_data = [
-        f"Bien: {item.get('bien', 0)}<br>Neutral: {item.get('neutral', 0)}<br>Mal: {item.get('mal', 0)}"
-        f"<br><br>{hover_comment_title}:<br>{item.get(hover_comment_key, DEFAULT_HOVER_COMMENT)}"
-        for item in sorted_tags
+        f"Bien: {bien}<br>Neutral: {neutral}<br>Mal: {mal}"
+        f"<br><br>{hover_comment_title}:<br>{comment}"
+        for bien, neutral, mal, comment in zip(
+            top["bien"], top["neutral"], top["mal"],
+            top[hover_comment_key].astype(str).str[:400],
+        )
     ]
 
     fig = go.Figure(
@@ -194,21 +297,33 @@ def render_tag_balance(tag_insights: list[dict], balance_mode: str) -> go.Figure
         margin={"t": 50, "b": 30},
     )
     fig.add_hline(y=0, line_width=1, line_dash="dash", line_color="#9E9E9E")
-    return fig
+    return fig.to_dict()
 
 
 def render_sentiment_section(sentiment_scores: dict) -> None:
     if not sentiment_scores:
         return
 
+    # Ambas figuras vienen de builders cacheados con st.cache_data: el caso
+    # común es un hit directo, así que se llaman en secuencia (ejecutarlas en
+    # otro thread solo pagaría el pool y correría el cache sin ScriptRunContext).
+    fig_bar = render_score_bar(sentiment_scores)
+    fig_pie = render_distribution_donut(sentiment_scores)
+
     col_bar, col_pie = st.columns([3, 2])
     with col_bar:
-        st.plotly_chart(render_score_bar(sentiment_scores), use_container_width=True)
+        st.plotly_chart(fig_bar, use_container_width=True)
     with col_pie:
-        st.plotly_chart(render_distribution_donut(sentiment_scores), use_container_width=True)
+        if fig_pie is not None:
+            st.plotly_chart(fig_pie, use_container_width=True)
 
 
-def render_tag_insights_section(tag_insights: list[dict]) -> None:
+@st.fragment
+def render_tag_insights_section() -> None:
+    # Fragment: cambiar el radio "Top Malos/Top Buenos" rerenderiza solo esta
+    # sección en vez de relanzar todo el script (carga de datos, análisis IA
+    # y el resto de gráficos). Los insights llegan vía session_state.
+    tag_insights = st.session_state.get("dashboard_tag_insights", [])
     if not tag_insights:
         return
 
@@ -218,11 +333,19 @@ def render_tag_insights_section(tag_insights: list[dict]) -> None:
         ["Top Malos", "Top Buenos"],
         horizontal=True,
     )
+    views = prepare_tag_views(tag_insights)
+    balance_key = "balance_pos_top5" if balance_mode == "Top Buenos" else "balance_neg_top5"
+
     t1, t2 = st.columns(2)
     with t1:
-        st.plotly_chart(render_tags_by_polarity(tag_insights), use_container_width=True)
+        st.plotly_chart(
+            render_tags_by_polarity(views["polarity_top5"]), use_container_width=True
+        )
     with t2:
-        st.plotly_chart(render_tag_balance(tag_insights, balance_mode), use_container_width=True)
+        st.plotly_chart(
+            render_tag_balance(views[balance_key], balance_mode),
+            use_container_width=True,
+        )
 
 
 def render_metadata(metadata: dict) -> list[dict]:
@@ -261,9 +384,10 @@ def render_executive_summary(summary: dict) -> None:
     debilidades = summary.get("debilidades", [])
     plan_mejora = summary.get("plan_mejora", [])
 
-    fortalezas_text = "\n".join(f"- {item}" for item in fortalezas) if fortalezas else "Sin fortalezas destacadas"
-    debilidades_text = "\n".join(f"- {item}" for item in debilidades) if debilidades else "Sin debilidades destacadas"
-    plan_text = "\n".join(f"- {item}" for item in plan_mejora) if plan_mejora else "Sin plan sugerido"
+    # "- " + join evita el generador y un f-string por ítem en cada rerun.
+    fortalezas_text = ("- " + "\n- ".join(fortalezas)) if fortalezas else "Sin fortalezas destacadas"
+    debilidades_text = ("- " + "\n- ".join(debilidades)) if debilidades else "Sin debilidades destacadas"
+    plan_text = ("- " + "\n- ".join(plan_mejora)) if plan_mejora else "Sin plan sugerido"
 
     rc1.info(
         f"**Resumen**\n\n{summary.get('resumen', '')}\n\n"
@@ -292,12 +416,16 @@ def main():
     stats = get_data_summary(df)
 
     # ── KPIs ───────────────────────────────────────────────────────────────────
-    c1, c2, c3, c4, c5 = st.columns(5)
-    c1.metric("Comensales", stats["total_customers"])
-    c2.metric("Consumo Promedio", f"S/. {stats['avg_consumption']:.2f}")
-    c3.metric("Consumo Máximo", f"S/. {stats['max_consumption']:.2f}")
-    c4.metric("Consumo Mínimo", f"S/. {stats['min_consumption']:.2f}")
-    c5.metric("Ingresos Totales", f"S/. {stats['total_revenue']:.2f}")
+    st.markdown(
+        build_kpi_row(
+            stats["total_customers"],
+            stats["avg_consumption"],
+            stats["max_consumption"],
+            stats["min_consumption"],
+            stats["total_revenue"],
+        ),
+        unsafe_allow_html=True,
+    )
 
     st.markdown("---")
 
@@ -330,7 +458,8 @@ def main():
     # ── Gráficos de sentimiento ────────────────────────────────────────────────
     sentiment_scores = result.get("sentiment_scores", {})
     render_sentiment_section(sentiment_scores)
-    render_tag_insights_section(tag_insights)
+    st.session_state["dashboard_tag_insights"] = tag_insights
+    render_tag_insights_section()
 
     # ── Temas principales ──────────────────────────────────────────────────────
     key_themes = result.get("key_themes", {})
@@ -363,7 +492,11 @@ def main():
     # ── Datos crudos ───────────────────────────────────────────────────────────
     st.markdown("---")
     with st.expander("📂 Ver datos originales"):
-        st.dataframe(df, use_container_width=True)
+        # Los hijos del expander se serializan aunque esté colapsado; la tabla
+        # solo se envía al cliente tras un click explícito (y acotada a 1000
+        # filas para no inflar el payload Arrow).
+        if st.checkbox("Mostrar tabla", value=False, key="show_raw_data"):
+            st.dataframe(df.head(1000), use_container_width=True)
 
 
 if __name__ == "__main__":
@@ -1,11 +1,27 @@
+import asyncio
 import uuid
 
+import numpy as np
 import pandas as pd
+import plotly.graph_objects as go
 import streamlit as st
 from langgraph.types import Command
 
-from Backend.Leads.leads_agent import create_leads_agent, regenerate_single_promotion
+from Backend.Leads.leads_agent import (
+    aregenerate_single_promotion,
+    create_leads_agent,
+    regenerate_single_promotion,
+)
 from Frontend.utils.data_loader import (
+    COL_AMBIENTE,
+    COL_ATENCION,
+    COL_CAMBIO,
+    COL_COMIDA,
+    COL_CONSUMO,
+    COL_ID,
+    COL_MEJORA_ATENCION,
+    COL_PRECIO_CALIDAD,
+    COL_TEL,
     df_to_text,
     get_customer_contact_data,
     get_data_summary,
@@ -19,20 +35,98 @@ st.set_page_config(
     layout="wide",
 )
 
+# Columnas que esta página realmente consume (contacto + feedback para el LLM);
+# cualquier columna extra que gane el CSV no se parsea ni viaja al cache.
+LEADS_COLUMNS = (
+    COL_ID,
+    COL_TEL,
+    COL_CONSUMO,
+    COL_MEJORA_ATENCION,
+    COL_ATENCION,
+    COL_COMIDA,
+    COL_PRECIO_CALIDAD,
+    COL_AMBIENTE,
+    COL_CAMBIO,
+)
+
 CATEGORIA_META = {
-    "alto_valor": {"label": "Alto Valor", "emoji": "🟡"},
-    "retencion":  {"label": "Retención",  "emoji": "🔴"},
-    "recurrente": {"label": "Recurrente", "emoji": "🟢"},
-    "referidor":  {"label": "Referidor",  "emoji": "🔵"},
+    "alto_valor": {"label": "Alto Valor", "emoji": "🟡", "color": "#FFC107"},
+    "retencion":  {"label": "Retención",  "emoji": "🔴", "color": "#F44336"},
+    "recurrente": {"label": "Recurrente", "emoji": "🟢", "color": "#4CAF50"},
+    "referidor":  {"label": "Referidor",  "emoji": "🔵", "color": "#2196F3"},
 }
 
 
-# ── Agent (cached globally, el checkpointer persiste en el servidor) ───────────
-@st.cache_resource
+# ── Agent (cached globalmente, el checkpointer persiste en el servidor) ────────
+# max_entries=1 evita acumular grafos compilados viejos (con su LLM y
+# checkpointer en memoria) si el módulo se recarga durante desarrollo.
+@st.cache_resource(max_entries=1, show_spinner=False)
 def get_agent():
     return create_leads_agent()
 
 
+# Tope defensivo para no repetir stringify gigantes ni desbordar el contexto
+# del LLM cuando el dataset crezca.
+MAX_LLM_TEXT_CHARS = 50_000
+
+
+def _df_fingerprint(df: pd.DataFrame) -> tuple:
+    """Huella barata del dataset para claves de cache (evita hash celda a celda).
+
+    Por contenido, no por identidad: st.cache_data devuelve una copia
+    despickleada nueva en cada llamada, así que id(df) cambia por rerun.
+    """
+    last_id = str(df[COL_ID].iloc[-1]) if len(df) else ""
+    return (len(df), df.shape[1], last_id)
+
+
+# Hash compartido para todo cache que reciba el dataframe.
+_DF_HASH = {pd.DataFrame: _df_fingerprint}
+
+
+@st.cache_data(hash_funcs=_DF_HASH)
+def get_df_text(df: pd.DataFrame) -> str:
+    return df_to_text(df)[:MAX_LLM_TEXT_CHARS]
+
+
+@st.cache_data(hash_funcs=_DF_HASH)
+def get_contact_text(df: pd.DataFrame) -> str:
+    return get_customer_contact_data(df)
+
+
+@st.cache_data(hash_funcs=_DF_HASH)
+def get_feedback_map(df: pd.DataFrame) -> dict:
+    """Bloques de feedback por cliente, construidos una vez por dataset.
+
+    La fase de revisión se re-ejecuta con cada interacción; sin cache el
+    recorrido fila a fila del dataframe se repetía en cada rerun.
+    """
+    return get_feedback_blocks(df)
+
+
+@st.cache_data(hash_funcs=_DF_HASH)
+def get_summary_stats(df: pd.DataFrame) -> dict:
+    """Estadísticas del dataset cacheadas: se calculan una vez por dataset,
+    no en cada rerun del slider o de los checkboxes."""
+    return get_data_summary(df)
+
+
+@st.cache_data(hash_funcs=_DF_HASH)
+def get_sorted_consumption(df: pd.DataFrame) -> np.ndarray:
+    """Array de consumos ordenado (se calcula una vez por dataset)."""
+    return np.sort(df[COL_CONSUMO].to_numpy())
+
+
+def count_qualifying(df: pd.DataFrame, threshold: float) -> int:
+    """Cuenta de clientes que superan el umbral.
+
+    Sobre el array ordenado cacheado basta una búsqueda binaria O(log N)
+    por rerun, en vez de re-escanear la columna en cada tick del slider.
+    """
+    arr = get_sorted_consumption(df)
+    return int(len(arr) - np.searchsorted(arr, threshold, side="left"))
+
+
 # ── Session state ──────────────────────────────────────────────────────────────
 def init_session():
     defaults = {
@@ -46,21 +140,182 @@ def init_session():
             st.session_state[key] = val
 
 
+def track_lead_keys(*keys: str):
+    """Registra claves dinámicas por lead para poder limpiarlas en reset_flow."""
+    st.session_state.setdefault("_leads_dynamic_keys", set()).update(keys)
+
+
 def reset_flow():
     """Reinicia el flujo completo con un nuevo thread."""
     st.session_state.leads_phase = "idle"
     st.session_state.leads_thread_id = str(uuid.uuid4())
     st.session_state.leads_promotions = []
     st.session_state.leads_approved = []
-    # Limpiar claves de mensajes e instrucciones previas
-    for key in list(st.session_state.keys()):
-        if key.startswith(("msg_", "instr_", "chk_", "regen_", "pending_msg_", "clear_instr_")):
-            del st.session_state[key]
+    # Limpiar solo las claves registradas por los leads, sin barrer todo
+    # session_state comparando prefijos clave por clave.
+    for key in st.session_state.pop("_leads_dynamic_keys", ()):
+        st.session_state.pop(key, None)
+
+
+# Fallback único para categorías desconocidas: evita construir un dict
+# temporal por lead y por rerun en los loops de render.
+_DEFAULT_META = {"emoji": "⚪", "label": ""}
+
+
+def get_categoria_meta(cat: str) -> dict:
+    return CATEGORIA_META.get(cat) or {**_DEFAULT_META, "label": cat}
+
+
+# Etiquetas formateadas una sola vez al importar el módulo: el lookup por
+# llamada es un acceso a dict, sin re-formatear el f-string en cada rerun.
+_CATEGORIA_LABELS = {
+    cat: f"{meta['emoji']} {meta['label']}" for cat, meta in CATEGORIA_META.items()
+}
 
 
 def categoria_label(cat: str) -> str:
-    meta = CATEGORIA_META.get(cat, {"emoji": "⚪", "label": cat})
-    return f"{meta['emoji']} {meta['label']}"
+    return _CATEGORIA_LABELS.get(cat) or f"⚪ {cat}"
+
+
+@st.cache_data
+def build_category_distribution(cat_counts: tuple) -> dict:
+    """Figura única de distribución por categoría (un widget en vez de N)."""
+    labels = [CATEGORIA_META.get(c, {"label": c})["label"] for c, _ in cat_counts]
+    colors = [CATEGORIA_META.get(c, {}).get("color", "#9E9E9E") for c, _ in cat_counts]
+    values = [n for _, n in cat_counts]
+
+    fig = go.Figure(go.Bar(x=labels, y=values, marker_color=colors))
+    fig.update_layout(
+        title="Distribución por Categoría",
+        yaxis_title="Leads",
+        height=300,
+        margin={"t": 40, "b": 30},
+    )
+    return fig.to_dict()
+
+
+# Esquema fijo del CSV exportado: pasarlo explícito evita la pasada de
+# inferencia de columnas sobre la lista de dicts (claves ausentes → NaN).
+EXPORT_COLS = ("id_cliente", "telefono", "consumo", "categoria", "motivo", "mensaje_promo")
+
+
+@st.cache_data
+def leads_to_csv(leads: list[dict]) -> bytes:
+    """Serializa los leads aprobados a CSV una sola vez por contenido."""
+    export_df = pd.DataFrame.from_records(leads, columns=list(EXPORT_COLS))
+    return export_df.to_csv(index=False).encode("utf-8")
+
+
+@st.cache_data
+def build_leads_display_df(leads: list[dict]) -> pd.DataFrame:
+    """Proyección de leads aprobados para la tabla (cacheada por contenido)."""
+    leads_df = pd.DataFrame(leads)
+    return pd.DataFrame(
+        {
+            "Cliente": leads_df["id_cliente"],
+            "Categoría": leads_df["categoria"].map(categoria_label),
+            "Teléfono": leads_df.get("telefono", "—"),
+            "Consumo": leads_df.get("consumo", 0.0),
+            "Motivo": leads_df.get("motivo", "—"),
+            "Mensaje": leads_df.get("mensaje_promo", "—"),
+        }
+    )
+
+
+@st.fragment
+def render_lead_card(
+    promo: dict,
+    id_c: int,
+    meta: dict,
+    telefono: str,
+    motivo: str,
+    feedback_blocks: dict,
+):
+    """Tarjeta de revisión de un lead, aislada como fragment.
+
+    Editar el mensaje, escribir instrucciones o regenerar con IA solo
+    re-ejecuta esta tarjeta, no la página completa con sus N contenedores.
+    """
+    msg_key = f"msg_{id_c}"
+    track_lead_keys(
+        msg_key,
+        f"pending_msg_{id_c}",
+        f"clear_instr_{id_c}",
+        f"chk_{id_c}",
+        f"instr_{id_c}",
+        f"regen_{id_c}",
+    )
+
+    # Aplicar mensaje pendiente (regeneración IA) ANTES de instanciar el widget
+    pending_key = f"pending_msg_{id_c}"
+    if pending_key in st.session_state:
+        st.session_state[msg_key] = st.session_state.pop(pending_key)
+    elif msg_key not in st.session_state:
+        st.session_state[msg_key] = promo.get("mensaje_promo", "")
+
+    with st.container(border=True):
+
+        # ── Cabecera + checkbox ────────────────────────────────────
+        h_col, chk_col = st.columns([5, 1])
+        with h_col:
+            st.markdown(
+                f"#### {meta['emoji']} Cliente #{id_c}"
+                f"&nbsp;|&nbsp; S/. {promo['consumo']:.2f}"
+                f"&nbsp;|&nbsp; {meta['label']}"
+            )
+        with chk_col:
+            st.checkbox("Aprobar", value=True, key=f"chk_{id_c}")
+
+        # ── Info del cliente ───────────────────────────────────────
+        # Una sola llamada a markdown en vez de columnas + una por celda:
+        # menos widgets registrados por lead en cada rerun.
+        st.markdown(
+            f"📞 **Tel:** `{telefono}` &nbsp;&nbsp; 💡 **Motivo:** {motivo}"
+        )
+
+        # ── Mensaje editable ───────────────────────────────────────
+        st.text_area(
+            "✏️ Mensaje promocional (editable directamente)",
+            key=msg_key,
+            height=110,
+        )
+
+        # ── Sección de regeneración con IA ─────────────────────────
+        # Aplicar limpieza pendiente de instrucciones ANTES de instanciar el widget
+        instr_key = f"instr_{id_c}"
+        if st.session_state.pop(f"clear_instr_{id_c}", False):
+            st.session_state[instr_key] = ""
+
+        st.markdown("**¿Quieres que la IA modifique el mensaje?**")
+        instr_col, btn_col = st.columns([4, 1])
+        with instr_col:
+            st.text_input(
+                "instrucciones",
+                key=instr_key,
+                placeholder=(
+                    "Ej: Hazlo más formal, ofrece 20% de descuento, "
+                    "menciona el ceviche que pidió..."
+                ),
+                label_visibility="collapsed",
+            )
+        with btn_col:
+            if st.button(
+                "🤖 Regenerar",
+                key=f"regen_{id_c}",
+                use_container_width=True,
+            ):
+                instructions = st.session_state.get(instr_key, "").strip()
+                if not instructions:
+                    st.warning("Escribe instrucciones antes de regenerar.")
+                else:
+                    feedback = feedback_blocks.get(id_c, "Sin feedback disponible.")
+                    with st.spinner(f"Regenerando mensaje para cliente #{id_c}…"):
+                        new_msg = regenerate_single_promotion(
+                            promo, instructions, feedback
+                        )
+                    st.session_state[f"pending_msg_{id_c}"] = new_msg
+                    st.session_state[f"clear_instr_{id_c}"] = True
+                    st.rerun(scope="fragment")
 
 
 # ── Main ───────────────────────────────────────────────────────────────────────
@@ -75,12 +330,16 @@ def main():
 
     # ── Carga de datos ─────────────────────────────────────────────────────────
     try:
-        df = load_data()
+        df = load_data(LEADS_COLUMNS)
     except Exception as e:
         st.error(f"No se pudo cargar el archivo de datos: {e}")
         return
 
-    stats = get_data_summary(df)
+    if df.empty:
+        st.warning("El dataset está vacío: no hay clientes para generar leads.")
+        return
+
+    stats = get_summary_stats(df)
 
     # ── Sidebar ────────────────────────────────────────────────────────────────
     with st.sidebar:
@@ -95,7 +354,7 @@ def main():
             help="Filtro cuantitativo: solo pasan clientes que gastaron más de este monto",
         )
 
-        qualifying = int((df["costo_del_consumo"] >= spending_threshold).sum())
+        qualifying = count_qualifying(df, spending_threshold)
         st.info(
             f"Clientes que califican: **{qualifying} de {len(df)}**\n\n"
             f"_(gasto >= S/. {spending_threshold:.2f})_"
@@ -117,9 +376,14 @@ def main():
             agent = get_agent()
             config = {"configurable": {"thread_id": st.session_state.leads_thread_id}}
 
+            # Filtrar ANTES de serializar: solo las filas que califican viajan
+            # como texto al agente (menos string y menos tokens de prompt);
+            # el nodo de categorización re-aplica el umbral de todas formas.
+            df_q = df[df[COL_CONSUMO].to_numpy() >= spending_threshold]
+
             initial_state = {
-                "raw_data": df_to_text(df),
-                "customer_data": get_customer_contact_data(df),
+                "raw_data": get_df_text(df_q),
+                "customer_data": get_contact_text(df_q),
                 "spending_threshold": spending_threshold,
                 "categorized_leads": [],
                 "promotions": [],
@@ -144,6 +408,7 @@ def main():
                 # Inicializar mensajes en session_state para edición
                 for p in promotions:
                     st.session_state[f"msg_{p['id_cliente']}"] = p.get("mensaje_promo", "")
+                    track_lead_keys(f"msg_{p['id_cliente']}")
                 st.session_state.leads_phase = "awaiting_review"
                 st.rerun()
             else:
@@ -154,7 +419,7 @@ def main():
     # ══════════════════════════════════════════════════════════════════════════
     elif phase == "awaiting_review":
         promotions = st.session_state.leads_promotions
-        feedback_blocks = get_feedback_blocks(df)
+        feedback_blocks = get_feedback_map(df)
 
         if not promotions:
             st.warning("No se generaron leads con el umbral seleccionado.")
@@ -176,117 +441,101 @@ def main():
 
         st.markdown("---")
 
-        approve_flags: dict[int, bool] = {}
-
-        for promo in promotions:
-            id_c = promo["id_cliente"]
-            cat = promo.get("categoria", "")
-            meta = CATEGORIA_META.get(cat, {"emoji": "⚪", "label": cat})
-            msg_key = f"msg_{id_c}"
-
-            # Aplicar mensaje pendiente (regeneración IA) ANTES de instanciar el widget
-            pending_key = f"pending_msg_{id_c}"
-            if pending_key in st.session_state:
-                st.session_state[msg_key] = st.session_state.pop(pending_key)
-            elif msg_key not in st.session_state:
-                st.session_state[msg_key] = promo.get("mensaje_promo", "")
-
-            with st.container(border=True):
-
-                # ── Cabecera + checkbox ────────────────────────────────────
-                h_col, chk_col = st.columns([5, 1])
-                with h_col:
-                    st.markdown(
-                        f"#### {meta['emoji']} Cliente #{id_c}"
-                        f"&nbsp;|&nbsp; S/. {promo['consumo']:.2f}"
-                        f"&nbsp;|&nbsp; {meta['label']}"
-                    )
-                with chk_col:
-                    approve_flags[id_c] = st.checkbox(
-                        "Aprobar", value=True, key=f"chk_{id_c}"
-                    )
-
-                # ── Info del cliente ───────────────────────────────────────
-                i1, i2 = st.columns(2)
-                i1.markdown(f"📞 **Tel:** `{promo.get('telefono', '—')}`")
-                i2.markdown(f"💡 **Motivo:** {promo.get('motivo', '—')}")
-
-                # ── Mensaje editable ───────────────────────────────────────
-                st.text_area(
-                    "✏️ Mensaje promocional (editable directamente)",
-                    key=msg_key,
-                    height=110,
+        # Campos de display resueltos una sola vez por pasada de render; el
+        # loop de widgets ya no hace lookups .get() por fila. El meta por
+        # categoría se resuelve una vez por categoría única, no por lead.
+        unique_cats = {promo.get("categoria", "") for promo in promotions}
+        meta_map = {cat: get_categoria_meta(cat) for cat in unique_cats}
+        display_rows = [
+            (
+                promo,
+                promo["id_cliente"],
+                meta_map[promo.get("categoria", "")],
+                promo.get("telefono", "—"),
+                promo.get("motivo", "—"),
+            )
+            for promo in promotions
+        ]
+
+        for promo, id_c, meta, telefono, motivo in display_rows:
+            render_lead_card(promo, id_c, meta, telefono, motivo, feedback_blocks)
+
+        # ── Regeneración en lote ───────────────────────────────────────────────
+        # Todos los leads con instrucciones escritas se regeneran en paralelo
+        # con asyncio.gather: N llamadas cuestan ~la latencia de la más lenta.
+        # El botón se renderiza siempre y la lista se arma recién al click:
+        # las instrucciones viven dentro de fragments, así que un conteo
+        # calculado en el render de la página quedaría desactualizado.
+        if st.button(
+            "🤖 Regenerar todos los leads con instrucciones",
+            use_container_width=True,
+        ):
+            to_regen = [
+                (promo, id_c, st.session_state.get(f"instr_{id_c}", "").strip())
+                for promo, id_c, *_ in display_rows
+                if st.session_state.get(f"instr_{id_c}", "").strip()
+            ]
+            if not to_regen:
+                st.warning(
+                    "Escribe instrucciones en al menos un lead antes de "
+                    "regenerar en lote."
                 )
-
-                # ── Sección de regeneración con IA ─────────────────────────
-                # Aplicar limpieza pendiente de instrucciones ANTES de instanciar el widget
-                instr_key = f"instr_{id_c}"
-                if st.session_state.pop(f"clear_instr_{id_c}", False):
-                    st.session_state[instr_key] = ""
-
-                st.markdown("**¿Quieres que la IA modifique el mensaje?**")
-                instr_col, btn_col = st.columns([4, 1])
-                with instr_col:
-                    st.text_input(
-                        "instrucciones",
-                        key=instr_key,
-                        placeholder=(
-                            "Ej: Hazlo más formal, ofrece 20% de descuento, "
-                            "menciona el ceviche que pidió..."
-                        ),
-                        label_visibility="collapsed",
-                    )
-                with btn_col:
-                    if st.button(
-                        "🤖 Regenerar",
-                        key=f"regen_{id_c}",
-                        use_container_width=True,
-                    ):
-                        instructions = st.session_state.get(instr_key, "").strip()
-                        if not instructions:
-                            st.warning("Escribe instrucciones antes de regenerar.")
-                        else:
-                            feedback = feedback_blocks.get(id_c, "Sin feedback disponible.")
-                            with st.spinner(f"Regenerando mensaje para cliente #{id_c}…"):
-                                new_msg = regenerate_single_promotion(
-                                    promo, instructions, feedback
-                                )
-                            st.session_state[f"pending_msg_{id_c}"] = new_msg
-                            st.session_state[f"clear_instr_{id_c}"] = True
-                            st.rerun()
+            else:
+                async def _run():
+                    return await asyncio.gather(*(
+                        aregenerate_single_promotion(
+                            promo, instructions,
+                            feedback_blocks.get(id_c, "Sin feedback disponible."),
+                        )
+                        for promo, id_c, instructions in to_regen
+                    ))
+
+                with st.spinner(f"Regenerando {len(to_regen)} mensajes en paralelo…"):
+                    new_msgs = asyncio.run(_run())
+                for (_, id_c, _), new_msg in zip(to_regen, new_msgs):
+                    st.session_state[f"pending_msg_{id_c}"] = new_msg
+                    st.session_state[f"clear_instr_{id_c}"] = True
+                st.rerun()
 
         # ── Confirmación ───────────────────────────────────────────────────────
+        # Los checkboxes chk_* viven dentro de fragments: togglearlos no
+        # re-ejecuta esta sección, así que los flags se leen recién al click
+        # (un conteo o disabled= calculado acá quedaría desactualizado).
         st.markdown("---")
-        n_approved = sum(1 for v in approve_flags.values() if v)
         cola, colb = st.columns([3, 1])
-        cola.markdown(f"**{n_approved} de {len(promotions)} leads seleccionados para enviar.**")
+        cola.markdown("**Desmarca los leads que no quieras enviar y confirma.**")
 
         if colb.button(
             "✅ Confirmar envío",
             type="primary",
             use_container_width=True,
-            disabled=(n_approved == 0),
         ):
-            approved_leads = [
-                {
-                    **promo,
-                    "mensaje_promo": st.session_state.get(
-                        f"msg_{promo['id_cliente']}", promo["mensaje_promo"]
-                    ),
-                }
-                for promo in promotions
-                if approve_flags.get(promo["id_cliente"], False)
-            ]
-
-            agent = get_agent()
-            config = {"configurable": {"thread_id": st.session_state.leads_thread_id}}
+            # Una sola pasada: copiar el promo solo cuando el mensaje fue
+            # editado; sin edición se reutiliza el dict original tal cual.
+            approved_leads: list[dict] = []
+            append_approved = approved_leads.append
+            for promo in promotions:
+                id_c = promo["id_cliente"]
+                if not st.session_state.get(f"chk_{id_c}", True):
+                    continue
+                msg = st.session_state.get(f"msg_{id_c}", promo["mensaje_promo"])
+                if msg == promo["mensaje_promo"]:
+                    append_approved(promo)
+                else:
+                    append_approved({**promo, "mensaje_promo": msg})
+
+            if not approved_leads:
+                st.warning("No hay leads seleccionados: marca al menos uno antes de confirmar.")
+            else:
+                agent = get_agent()
+                config = {"configurable": {"thread_id": st.session_state.leads_thread_id}}
 
-            with st.spinner("Confirmando leads aprobados…"):
-                result = agent.invoke(Command(resume=approved_leads), config=config)
+                with st.spinner("Confirmando leads aprobados…"):
+                    result = agent.invoke(Command(resume=approved_leads), config=config)
 
-            st.session_state.leads_approved = result.get("approved_leads", approved_leads)
-            st.session_state.leads_phase = "done"
-            st.rerun()
+                st.session_state.leads_approved = result.get("approved_leads", approved_leads)
+                st.session_state.leads_phase = "done"
+                st.rerun()
 
     # ══════════════════════════════════════════════════════════════════════════
     # FASE 3 — DONE
@@ -303,45 +552,63 @@ def main():
         st.markdown("---")
 
         if approved:
+            # Un solo array y reducciones en C, en vez de dos generadores
+            # Python recorriendo la lista por cada métrica.
+            consumos = np.fromiter(
+                (l.get("consumo", 0) for l in approved),
+                dtype=np.float64,
+                count=len(approved),
+            )
             k1, k2, k3 = st.columns(3)
             k1.metric("Leads aprobados", len(approved))
-            k2.metric(
-                "Consumo promedio",
-                f"S/. {sum(l.get('consumo', 0) for l in approved) / len(approved):.2f}",
-            )
-            k3.metric(
-                "Valor total potencial",
-                f"S/. {sum(l.get('consumo', 0) for l in approved):.2f}",
+            k2.metric("Consumo promedio", f"S/. {consumos.mean():.2f}")
+            k3.metric("Valor total potencial", f"S/. {consumos.sum():.2f}")
+
+            cat_counts = pd.DataFrame(approved)["categoria"].value_counts()
+            st.plotly_chart(
+                build_category_distribution(tuple(cat_counts.items())),
+                use_container_width=True,
             )
             st.markdown("---")
 
-        for lead in approved:
-            cat = lead.get("categoria", "")
-            meta = CATEGORIA_META.get(cat, {"emoji": "⚪", "label": cat})
+        if approved:
+            # Una sola tabla en lugar de un contenedor + columnas + markdowns
+            # por lead: el DOM del navegador queda en O(1) widgets y el
+            # detalle se muestra solo para la fila seleccionada.
+            display_df = build_leads_display_df(approved)
+            event = st.dataframe(
+                display_df,
+                use_container_width=True,
+                hide_index=True,
+                column_config={
+                    "Consumo": st.column_config.NumberColumn(format="S/. %.2f"),
+                    "Mensaje": st.column_config.TextColumn(width="large"),
+                },
+                selection_mode="single-row",
+                on_select="rerun",
+            )
 
-            with st.container(border=True):
-                st.markdown(
-                    f"#### {meta['emoji']} Cliente #{lead['id_cliente']}"
-                    f"&nbsp;|&nbsp; S/. {lead.get('consumo', 0):.2f}"
-                    f"&nbsp;|&nbsp; {meta['label']}"
-                )
-                c1, c2 = st.columns(2)
-                c1.markdown(f"📞 **Teléfono:** `{lead.get('telefono', '—')}`")
-                c2.markdown(f"💡 **Motivo:** {lead.get('motivo', '—')}")
-                st.markdown("**Mensaje a enviar:**")
-                st.info(lead.get("mensaje_promo", "—"))
+            selected_rows = event.selection.rows
+            if selected_rows:
+                lead = approved[selected_rows[0]]
+                meta = get_categoria_meta(lead.get("categoria", ""))
+                with st.container(border=True):
+                    st.markdown(
+                        f"#### {meta['emoji']} Cliente #{lead['id_cliente']}"
+                        f"&nbsp;|&nbsp; S/. {lead.get('consumo', 0):.2f}"
+                        f"&nbsp;|&nbsp; {meta['label']}"
+                    )
+                    c1, c2 = st.columns(2)
+                    c1.markdown(f"📞 **Teléfono:** `{lead.get('telefono', '—')}`")
+                    c2.markdown(f"💡 **Motivo:** {lead.get('motivo', '—')}")
+                    st.markdown("**Mensaje a enviar:**")
+                    st.info(lead.get("mensaje_promo", "—"))
 
         if approved:
             st.markdown("---")
-            export_df = pd.DataFrame(approved)
-            cols = [
-                c for c in
-                ["id_cliente", "telefono", "consumo", "categoria", "motivo", "mensaje_promo"]
-                if c in export_df.columns
-            ]
             st.download_button(
                 label="⬇️ Exportar leads aprobados (CSV)",
-                data=export_df[cols].to_csv(index=False).encode("utf-8"),
+                data=leads_to_csv(approved),
                 file_name="leads_aprobados.csv",
                 mime="text/csv",
             )
@@ -1,15 +1,17 @@
+import csv
+import hashlib
+import html
+import os
+import threading
 import uuid
+from collections import OrderedDict
 
 import pandas as pd
 import streamlit as st
 from langgraph.types import Command
 
-from Backend.Marketing.marketing_agent import (
-    create_marketing_agent,
-    extract_top_dishes,
-    regenerate_campaign_image,
-    regenerate_campaign_text,
-)
+# Backend.Marketing se importa de forma diferida dentro de cada función que
+# lo usa: el primer render de la página no paga el import del stack de LLMs.
 from Frontend.utils.data_loader import load_data
 
 st.set_page_config(
@@ -21,24 +23,174 @@ st.set_page_config(
 TOP_DISHES_CSV = "Data/top_platos.csv"
 
 
+# Bloques HTML estáticos a nivel de módulo: se construyen una vez al importar
+# en lugar de re-evaluar el literal multilínea en cada rerun.
+_PLACEHOLDER_HTML = """
+<div style="
+    background: linear-gradient(135deg, #1a1a2e 0%, #16213e 50%, #0f3460 100%);
+    border-radius: 12px; height: 340px;
+    display: flex; align-items: center; justify-content: center;
+    flex-direction: column; color: #aaa; font-size: 1.1rem;
+    border: 1px dashed #444;
+">
+    <div style="font-size: 3rem; margin-bottom: 12px;">🖼️</div>
+    <div>La imagen de tu campaña aparecerá aquí</div>
+</div>
+"""
+
+# CSS inyectado una sola vez por sesión; el texto aprobado se envuelve en un
+# div mínimo con la clase en vez de re-parsear el estilo inline por render.
+_CAMPAIGN_CSS = """
+<style>
+.campaign-text {
+    background-color: #1e1e1e;
+    border-left: 4px solid #e63946;
+    border-radius: 6px;
+    padding: 16px 20px;
+    font-size: 1.05rem;
+    line-height: 1.7;
+    color: #f0f0f0;
+    white-space: pre-wrap;
+}
+</style>
+"""
+
+
+def _write_top_dishes_csv(dishes: list[dict]) -> None:
+    """Persiste el ranking en CSV solo si el contenido cambió.
+
+    Un hash del contenido en un sidecar ``.hash`` evita repetir el to_csv
+    cuando el cache se repuebla (restart del server, expiración del TTL)
+    con los mismos platos. La escritura es atómica (tmp + os.replace).
+    """
+    digest = hashlib.blake2b(repr(dishes).encode("utf-8"), digest_size=16).hexdigest()
+    hash_path = TOP_DISHES_CSV + ".hash"
+    try:
+        with open(hash_path, encoding="utf-8") as f:
+            if f.read().strip() == digest:
+                return
+    except OSError:
+        pass
+
+    # csv.writer directo: para dos columnas no hay razón de construir un
+    # DataFrame intermedio solo para serializarlo; el writer además escapa
+    # nombres de plato con comas o comillas.
+    tmp_path = TOP_DISHES_CSV + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(("plato", "menciones"))
+        writer.writerows((d["plato"], d["menciones"]) for d in dishes)
+    os.replace(tmp_path, TOP_DISHES_CSV)
+    with open(hash_path, "w", encoding="utf-8") as f:
+        f.write(digest)
+
+
 # ── Cached helpers ────────────────────────────────────────────────────────────
 
-@st.cache_data(show_spinner="Analizando platos favoritos con IA…")
+@st.cache_resource(show_spinner="Analizando platos favoritos con IA…", ttl=3600)
 def get_top_dishes() -> list[dict]:
+    # cache_resource devuelve SIEMPRE el mismo objeto (sin el pickle+copy de
+    # cache_data en cada hit): la lista debe tratarse como inmutable.
+    from Backend.Marketing.marketing_agent import extract_top_dishes
+
     df = load_data()
     food_col = "¿Qué te gustó más de la comida?"
     responses = df[food_col].dropna().tolist()
     dishes = extract_top_dishes(responses, top_n=10)
+    # Label del checkbox pre-formateado una sola vez por proceso; el loop
+    # del sidebar corre en cada rerun y ya no re-arma el f-string por plato.
+    for d in dishes:
+        d["label"] = f"**{d['plato']}**  ·  {d['menciones']} menciones"
     if dishes:
-        pd.DataFrame(dishes).to_csv(TOP_DISHES_CSV, index=False, encoding="utf-8")
+        _write_top_dishes_csv(dishes)
     return dishes
 
 
 @st.cache_resource
 def get_agent():
+    from Backend.Marketing.marketing_agent import create_marketing_agent
+
     return create_marketing_agent()
 
 
+# ── Almacén de imágenes ───────────────────────────────────────────────────────
+# Los bytes de imagen (varios MB) viven en un recurso compartido y en
+# session_state solo viaja un token corto: los reruns dejan de arrastrar y
+# rehashear el blob completo. LRU acotado para no crecer sin límite.
+
+_IMAGE_STORE_MAX = 16
+
+
+@st.cache_resource
+def _image_store() -> "OrderedDict[str, bytes]":
+    return OrderedDict()
+
+
+def _put_image(img_bytes: bytes) -> str:
+    """Guarda los bytes y devuelve un token corto para session_state."""
+    if not img_bytes:
+        return ""
+    store = _image_store()
+    token = uuid.uuid4().hex
+    store[token] = img_bytes
+    while len(store) > _IMAGE_STORE_MAX:
+        store.popitem(last=False)
+    return token
+
+
+def _get_image(token: str) -> bytes:
+    if not token:
+        return b""
+    store = _image_store()
+    img = store.get(token, b"")
+    if img:
+        store.move_to_end(token)
+    return img
+
+
+def _compress_image(img_bytes: bytes) -> tuple[bytes, bytes]:
+    """Convierte el PNG del modelo a WebP y arma un preview ≤800px.
+
+    El PNG original pesa varios MB; WebP q85 lo reduce 3-5x y el preview
+    es lo único que viaja al navegador en cada render de st.image.
+    """
+    import io
+
+    try:
+        from PIL import Image
+
+        im = Image.open(io.BytesIO(img_bytes))
+        full = io.BytesIO()
+        im.save(full, "WEBP", quality=85, method=4)
+        im.thumbnail((800, 800))
+        preview = io.BytesIO()
+        im.save(preview, "WEBP", quality=80)
+        return full.getvalue(), preview.getvalue()
+    except Exception:
+        # Sin Pillow (o formato inesperado): usar los bytes tal cual.
+        return img_bytes, img_bytes
+
+
+def _store_campaign_image(img_bytes: bytes) -> tuple[str, str]:
+    """Comprime y guarda la imagen; devuelve (token_full, token_preview)."""
+    if not img_bytes:
+        return "", ""
+    full, preview = _compress_image(img_bytes)
+    return _put_image(full), _put_image(preview)
+
+
+@st.cache_data
+def build_ranking_df(dishes: tuple[tuple, ...]) -> pd.DataFrame:
+    """DataFrame del ranking, construido una vez por snapshot de platos.
+
+    Recibe tuplas (hasheables en O(N) trivial) en vez de la lista de dicts,
+    evitando el hashing lento de DataFrames/objetos de Streamlit.
+    """
+    df = pd.DataFrame(dishes, columns=["Plato", "Menciones"])
+    df.index += 1
+    return df
+
+
 # ── Session state ─────────────────────────────────────────────────────────────
 
 def init_session():
@@ -46,10 +198,14 @@ def init_session():
         "mkt_phase": "idle",          # idle | reviewing | done
         "mkt_thread_id": str(uuid.uuid4()),
         "mkt_text": "",
-        "mkt_image": b"",
+        "mkt_image_id": "",
+        "mkt_image_preview_id": "",
+        "mkt_image_is_preview": False,
+        "mkt_last_image_instr": "",
         "mkt_selected": [],
         "mkt_approved_text": "",
-        "mkt_approved_image": b"",
+        "mkt_approved_image_id": "",
+        "mkt_approved_image_preview_id": "",
     }
     for key, val in defaults.items():
         if key not in st.session_state:
@@ -60,10 +216,14 @@ def reset_flow():
     st.session_state.mkt_phase = "idle"
     st.session_state.mkt_thread_id = str(uuid.uuid4())
     st.session_state.mkt_text = ""
-    st.session_state.mkt_image = b""
+    st.session_state.mkt_image_id = ""
+    st.session_state.mkt_image_preview_id = ""
+    st.session_state.mkt_image_is_preview = False
+    st.session_state.mkt_last_image_instr = ""
     st.session_state.mkt_selected = []
     st.session_state.mkt_approved_text = ""
-    st.session_state.mkt_approved_image = b""
+    st.session_state.mkt_approved_image_id = ""
+    st.session_state.mkt_approved_image_preview_id = ""
     for key in list(st.session_state.keys()):
         if key.startswith(("mkt_instr_", "mkt_pending_", "mkt_clear_", "mkt_error")):
             del st.session_state[key]
@@ -74,6 +234,19 @@ def reset_flow():
 def main():
     init_session()
 
+    # Warm-up en segundo plano: compilar el grafo (imports del stack LLM
+    # incluidos) mientras el usuario elige platos, para que el primer
+    # "Generar Campaña" no pague el init de forma síncrona. Se calienta el
+    # singleton del backend directamente: no necesita contexto de Streamlit.
+    if "mkt_agent_warmup" not in st.session_state:
+        def _warm_agent():
+            from Backend.Marketing.marketing_agent import create_marketing_agent
+
+            create_marketing_agent()
+
+        threading.Thread(target=_warm_agent, daemon=True).start()
+        st.session_state.mkt_agent_warmup = True
+
     st.title("🎨 Campañas de Marketing")
     st.caption(
         "Selecciona los platos estrella · genera texto e imagen con IA · "
@@ -95,28 +268,30 @@ def main():
         st.caption("Selecciona los platos que quieres destacar.")
         st.markdown("---")
 
-        selected_dishes: list[str] = []
+        # Los checkboxes viven en un form: marcar/desmarcar N platos ya no
+        # dispara N reruns completos del script, solo el submit re-ejecuta.
         disabled_checks = phase != "idle"
-        for d in top_dishes:
-            label = f"**{d['plato']}**  ·  {d['menciones']} menciones"
-            if st.checkbox(
-                label, value=False, key=f"dish_{d['plato']}",
-                disabled=disabled_checks,
-            ):
-                selected_dishes.append(d["plato"])
+        with st.form("dish_selection", border=False):
+            # Solo se renderizan los widgets; la selección se lee de
+            # session_state recién al recibir el submit, sin reconstruir la
+            # lista en cada rerun.
+            for d in top_dishes:
+                st.checkbox(
+                    d["label"], value=False, key=f"dish_{d['plato']}",
+                    disabled=disabled_checks,
+                )
 
-        st.markdown("---")
+            st.markdown("---")
 
-        can_generate = len(selected_dishes) > 0 and phase == "idle"
-        if phase == "idle" and not selected_dishes:
-            st.caption("☝️ Selecciona al menos un plato.")
+            if phase == "idle":
+                st.caption("☝️ Selecciona al menos un plato.")
 
-        generate_btn = st.button(
-            "✨ Generar Campaña",
-            type="primary",
-            use_container_width=True,
-            disabled=not can_generate,
-        )
+            generate_btn = st.form_submit_button(
+                "✨ Generar Campaña",
+                type="primary",
+                use_container_width=True,
+                disabled=disabled_checks,
+            )
 
         if phase != "idle":
             if st.button("🗑️ Nueva campaña", use_container_width=True):
@@ -129,6 +304,17 @@ def main():
     if phase == "idle":
         _render_placeholder()
 
+        # Con el form ya no se puede deshabilitar el botón según la selección
+        # en vivo: se valida al recibir el submit.
+        selected_dishes: list[str] = []
+        if generate_btn:
+            selected_dishes = [
+                d["plato"] for d in top_dishes
+                if st.session_state.get(f"dish_{d['plato']}", False)
+            ]
+            if not selected_dishes:
+                st.warning("Selecciona al menos un plato antes de generar la campaña.")
+
         if generate_btn and selected_dishes:
             reset_flow()
             st.session_state.mkt_selected = selected_dishes
@@ -144,20 +330,36 @@ def main():
                 "error": "",
             }
 
+            # stream() en vez de invoke(): el status se actualiza a medida
+            # que cada nodo termina, en lugar de congelarse ~30s esperando
+            # el invoke completo.
+            node_labels = {
+                "generate_text": "✍️ Texto de campaña listo",
+                "generate_image": "🖼️ Imagen lista",
+            }
             with st.status("Generando campaña con IA…", expanded=True) as status:
-                st.write("✍️ Generando texto de campaña…")
-                st.write("🖼️ Generando imagen (esto puede tardar ~30s)…")
-                result = agent.invoke(initial_state, config=config)
+                st.write("✍️🖼️ Generando texto e imagen en paralelo (puede tardar ~30s)…")
+                for event in agent.stream(
+                    initial_state, config=config, stream_mode="updates"
+                ):
+                    for node in event:
+                        if node in node_labels:
+                            st.write(node_labels[node])
                 status.update(label="✅ Campaña generada", state="complete")
 
+            snapshot = agent.get_state(config)
+            result = snapshot.values
+
             if result.get("error"):
                 st.error(result["error"])
                 return
 
-            snapshot = agent.get_state(config)
             if snapshot.next:
                 st.session_state.mkt_text = result.get("campaign_text", "")
-                st.session_state.mkt_image = result.get("image_bytes", b"")
+                (
+                    st.session_state.mkt_image_id,
+                    st.session_state.mkt_image_preview_id,
+                ) = _store_campaign_image(result.get("image_bytes", b""))
                 st.session_state.mkt_phase = "reviewing"
                 st.rerun()
             else:
@@ -176,31 +378,24 @@ def main():
         _render_done()
 
     # ── Tabla de referencia ───────────────────────────────────────────────────
+    # La tabla se materializa recién cuando el usuario la pide: el expander
+    # colapsado renderiza igual su contenido en cada rerun, así que sin el
+    # gate pagaríamos el dataframe aunque nunca se abra.
     with st.expander("📊 Ver ranking de platos favoritos"):
-        df_dishes = pd.DataFrame(top_dishes)
-        df_dishes.index = df_dishes.index + 1
-        df_dishes.columns = ["Plato", "Menciones"]
-        st.dataframe(df_dishes, use_container_width=True)
+        if st.session_state.get("ranking_opened"):
+            ranking = build_ranking_df(
+                tuple((d["plato"], d["menciones"]) for d in top_dishes)
+            )
+            st.dataframe(ranking, use_container_width=True)
+        elif st.button("Cargar ranking"):
+            st.session_state.ranking_opened = True
+            st.rerun()
 
 
 # ── Renders ───────────────────────────────────────────────────────────────────
 
 def _render_placeholder():
-    st.markdown(
-        """
-        <div style="
-            background: linear-gradient(135deg, #1a1a2e 0%, #16213e 50%, #0f3460 100%);
-            border-radius: 12px; height: 340px;
-            display: flex; align-items: center; justify-content: center;
-            flex-direction: column; color: #aaa; font-size: 1.1rem;
-            border: 1px dashed #444;
-        ">
-            <div style="font-size: 3rem; margin-bottom: 12px;">🖼️</div>
-            <div>La imagen de tu campaña aparecerá aquí</div>
-        </div>
-        """,
-        unsafe_allow_html=True,
-    )
+    st.markdown(_PLACEHOLDER_HTML, unsafe_allow_html=True)
     st.markdown("---")
     st.info(
         "Selecciona platos en el panel izquierdo y pulsa "
@@ -208,32 +403,12 @@ def _render_placeholder():
     )
 
 
-def _render_reviewing():
-    dishes = st.session_state.mkt_selected
-
-    st.success(
-        "**Campaña generada.** Revisa el texto y la imagen. "
-        "Puedes editarlos directamente o pedirle cambios a la IA."
-    )
-
-    # ── Aplicar cambios pendientes (regeneración IA) ──────────────────────
-    if "mkt_pending_text" in st.session_state:
-        st.session_state.mkt_text = st.session_state.pop("mkt_pending_text")
-    if "mkt_pending_image" in st.session_state:
-        st.session_state.mkt_image = st.session_state.pop("mkt_pending_image")
-    if st.session_state.pop("mkt_clear_instr_text", False):
-        st.session_state["mkt_instr_text"] = ""
-    if st.session_state.pop("mkt_clear_instr_image", False):
-        st.session_state["mkt_instr_image"] = ""
-
-    # ── Imagen ────────────────────────────────────────────────────────────
-    st.subheader("🖼️ Imagen de campaña")
-
-    if st.session_state.mkt_image:
-        st.image(st.session_state.mkt_image, use_container_width=True)
-    else:
-        st.warning("No se pudo generar la imagen.")
+# Controles de regeneración aislados como fragments: cada tecla en los
+# inputs de instrucciones re-ejecuta solo el fragment, sin volver a emitir
+# la imagen (bytes de varios MB) ni el resto de la página por el websocket.
 
+@st.fragment
+def _render_image_controls(dishes: list[str]):
     st.markdown("**¿Quieres que la IA modifique la imagen?**")
     img_instr_col, img_btn_col = st.columns([4, 1])
     with img_instr_col:
@@ -249,26 +424,25 @@ def _render_reviewing():
             if not instructions:
                 st.warning("Escribe instrucciones antes de regenerar.")
             else:
+                from Backend.Marketing.marketing_agent import regenerate_campaign_image
+
                 with st.spinner("Regenerando imagen…"):
                     try:
-                        new_img = regenerate_campaign_image(dishes, instructions)
+                        # Preview 1024x1024 durante la iteración HITL: más
+                        # rápido y barato que la resolución final 1536x1024.
+                        new_img = regenerate_campaign_image(
+                            dishes, instructions, preview=True
+                        )
                         st.session_state.mkt_pending_image = new_img
-                        st.session_state.mkt_clear_instr_image = True
+                        st.session_state.mkt_image_is_preview = True
+                        st.session_state.mkt_last_image_instr = instructions
                         st.rerun()
                     except Exception as e:
                         st.error(f"Error regenerando imagen: {e}")
 
-    st.markdown("---")
-
-    # ── Texto ─────────────────────────────────────────────────────────────
-    st.subheader("📣 Texto de campaña")
-
-    st.text_area(
-        "✏️ Texto de campaña (editable directamente)",
-        key="mkt_text",
-        height=150,
-    )
 
+@st.fragment
+def _render_text_controls(dishes: list[str]):
     st.markdown("**¿Quieres que la IA modifique el texto?**")
     txt_instr_col, txt_btn_col = st.columns([4, 1])
     with txt_instr_col:
@@ -284,15 +458,98 @@ def _render_reviewing():
             if not instructions:
                 st.warning("Escribe instrucciones antes de regenerar.")
             else:
+                from Backend.Marketing.marketing_agent import regenerate_campaign_text
+
                 current_text = st.session_state.get("mkt_text", "")
                 with st.spinner("Regenerando texto…"):
                     new_text = regenerate_campaign_text(
                         current_text, dishes, instructions
                     )
                 st.session_state.mkt_pending_text = new_text
-                st.session_state.mkt_clear_instr_text = True
                 st.rerun()
 
+
+@st.fragment
+def _render_reviewing():
+    # Fragment: editar el texto de campaña (cada debounce del text_area)
+    # re-ejecuta solo esta sección, no el sidebar, get_top_dishes ni el
+    # expander de ranking. Los cambios de fase usan st.rerun() (scope app).
+    dishes = st.session_state.mkt_selected
+
+    st.success(
+        "**Campaña generada.** Revisa el texto y la imagen. "
+        "Puedes editarlos directamente o pedirle cambios a la IA."
+    )
+
+    # ── Aplicar cambios pendientes (regeneración IA) ──────────────────────
+    # El swap corre antes de instanciar los widgets, así que limpia las
+    # instrucciones en el mismo paso: no hacen falta flags mkt_clear_* ni
+    # escrituras extra de session_state por regeneración.
+    if "mkt_pending_text" in st.session_state:
+        st.session_state.mkt_text = st.session_state.pop("mkt_pending_text")
+        st.session_state["mkt_instr_text"] = ""
+    if "mkt_pending_image" in st.session_state:
+        (
+            st.session_state.mkt_image_id,
+            st.session_state.mkt_image_preview_id,
+        ) = _store_campaign_image(st.session_state.pop("mkt_pending_image"))
+        st.session_state["mkt_instr_image"] = ""
+
+    # ── Imagen ────────────────────────────────────────────────────────────
+    st.subheader("🖼️ Imagen de campaña")
+
+    preview_bytes = _get_image(st.session_state.mkt_image_preview_id)
+    if preview_bytes:
+        st.image(preview_bytes, use_container_width=True)
+    else:
+        st.warning("No se pudo generar la imagen.")
+
+    _render_image_controls(dishes)
+
+    st.markdown("---")
+
+    # ── Texto ─────────────────────────────────────────────────────────────
+    st.subheader("📣 Texto de campaña")
+
+    st.text_area(
+        "✏️ Texto de campaña (editable directamente)",
+        key="mkt_text",
+        height=150,
+    )
+
+    _render_text_controls(dishes)
+
+    # ── Regeneración combinada ────────────────────────────────────────────
+    # Con instrucciones para texto E imagen, un solo click dispara ambas
+    # llamadas en paralelo en el backend: ~la mitad del wall-clock frente a
+    # regenerar cada uno por separado.
+    if st.button("🤖 Regenerar texto e imagen a la vez", use_container_width=True):
+        txt_instr = st.session_state.get("mkt_instr_text", "").strip()
+        img_instr = st.session_state.get("mkt_instr_image", "").strip()
+        if not txt_instr or not img_instr:
+            st.warning(
+                "Escribe instrucciones de texto y de imagen antes de regenerar ambos."
+            )
+        else:
+            from Backend.Marketing.marketing_agent import regenerate_campaign_both
+
+            with st.spinner("Regenerando texto e imagen en paralelo…"):
+                try:
+                    new_text, new_img = regenerate_campaign_both(
+                        st.session_state.get("mkt_text", ""),
+                        dishes,
+                        txt_instr,
+                        img_instr,
+                        preview=True,
+                    )
+                    st.session_state.mkt_pending_text = new_text
+                    st.session_state.mkt_pending_image = new_img
+                    st.session_state.mkt_image_is_preview = True
+                    st.session_state.mkt_last_image_instr = img_instr
+                    st.rerun()
+                except Exception as e:
+                    st.error(f"Error regenerando campaña: {e}")
+
     # ── Botones de acción ─────────────────────────────────────────────────
     st.markdown("---")
     col_approve, col_back = st.columns([3, 1])
@@ -304,7 +561,32 @@ def _render_reviewing():
             use_container_width=True,
         ):
             approved_text = st.session_state.get("mkt_text", "")
-            approved_image = st.session_state.get("mkt_image", b"")
+            approved_image = _get_image(st.session_state.get("mkt_image_id", ""))
+
+            # La iteración HITL trabaja con previews 1024x1024: el costo de
+            # la resolución completa 1536x1024 se paga una sola vez, aquí,
+            # sobre las últimas instrucciones aprobadas.
+            if st.session_state.get("mkt_image_is_preview") and approved_image:
+                from Backend.Marketing.marketing_agent import regenerate_campaign_image
+
+                with st.spinner("Generando imagen final en alta resolución…"):
+                    try:
+                        approved_image = regenerate_campaign_image(
+                            dishes,
+                            st.session_state.get("mkt_last_image_instr", ""),
+                            preview=False,
+                        )
+                        (
+                            st.session_state.mkt_image_id,
+                            st.session_state.mkt_image_preview_id,
+                        ) = _store_campaign_image(approved_image)
+                        st.session_state.mkt_image_is_preview = False
+                        approved_image = _get_image(st.session_state.mkt_image_id)
+                    except Exception as e:
+                        st.warning(
+                            "No se pudo regenerar en alta resolución; se "
+                            f"aprueba el preview actual. ({e})"
+                        )
 
             agent = get_agent()
             config = {"configurable": {"thread_id": st.session_state.mkt_thread_id}}
@@ -321,9 +603,19 @@ def _render_reviewing():
             st.session_state.mkt_approved_text = result.get(
                 "approved_text", approved_text
             )
-            st.session_state.mkt_approved_image = result.get(
-                "approved_image", approved_image
-            )
+            resumed_image = result.get("approved_image", approved_image)
+            if resumed_image == approved_image:
+                # Mismos bytes que ya están comprimidos en el store: reutilizar
+                # tokens sin re-encodear.
+                st.session_state.mkt_approved_image_id = st.session_state.mkt_image_id
+                st.session_state.mkt_approved_image_preview_id = (
+                    st.session_state.mkt_image_preview_id
+                )
+            else:
+                (
+                    st.session_state.mkt_approved_image_id,
+                    st.session_state.mkt_approved_image_preview_id,
+                ) = _store_campaign_image(resumed_image)
             st.session_state.mkt_phase = "done"
             st.rerun()
 
@@ -337,11 +629,12 @@ def _render_done():
     st.success("✅ **Campaña aprobada** y lista para publicar.")
 
     approved_text = st.session_state.mkt_approved_text
-    approved_image = st.session_state.mkt_approved_image
+    approved_image = _get_image(st.session_state.mkt_approved_image_id)
+    approved_preview = _get_image(st.session_state.mkt_approved_image_preview_id)
 
     # ── Imagen final ──────────────────────────────────────────────────────
-    if approved_image:
-        st.image(approved_image, use_container_width=True, caption="Imagen aprobada")
+    if approved_preview:
+        st.image(approved_preview, use_container_width=True, caption="Imagen aprobada")
 
     st.markdown("---")
 
@@ -350,19 +643,9 @@ def _render_done():
 
     with text_col:
         st.subheader("📣 Texto de campaña")
+        st.markdown(_CAMPAIGN_CSS, unsafe_allow_html=True)
         st.markdown(
-            f"""
-            <div style="
-                background-color: #1e1e1e;
-                border-left: 4px solid #e63946;
-                border-radius: 6px;
-                padding: 16px 20px;
-                font-size: 1.05rem;
-                line-height: 1.7;
-                color: #f0f0f0;
-                white-space: pre-wrap;
-            ">{approved_text}</div>
-            """,
+            f'<div class="campaign-text">{html.escape(approved_text)}</div>',
             unsafe_allow_html=True,
         )
 
@@ -371,10 +654,10 @@ def _render_done():
 
         if approved_image:
             st.download_button(
-                "⬇️ Imagen (PNG)",
+                "⬇️ Imagen (WebP)",
                 data=approved_image,
-                file_name="campaña_marketing.png",
-                mime="image/png",
+                file_name="campaña_marketing.webp",
+                mime="image/webp",
                 use_container_width=True,
             )
 